@@ -0,0 +1,64 @@
+-- every statement here is safe to run again, upgrade-db uses this file to add the post counts to a database created before they existed without dropping any posts
+-- it runs as one transaction so no post can be written between the seed and the triggers and get counted twice or not at all
+BEGIN;
+
+-- the author and archive pages filter on these columns, so they get an index instead of a full scan
+CREATE INDEX IF NOT EXISTS post_author_created ON post (author_id, created);
+CREATE INDEX IF NOT EXISTS post_created ON post (created);
+
+-- summary tables for the sidebar, one row per month ('YYYY-MM') and per author
+-- strftime gives NULL for a created value that isnt a date, NOT NULL makes such a post fail at insert or update instead of landing in a month row the delete trigger can never match
+-- after the seed below they are only ever changed by the triggers, never recomputed with a GROUP BY
+CREATE TABLE IF NOT EXISTS post_month_count (
+    month TEXT PRIMARY KEY NOT NULL,
+    total INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS post_author_count (
+    author_id INTEGER PRIMARY KEY,
+    total INTEGER NOT NULL,
+    FOREIGN KEY (author_id) REFERENCES user (id)
+);
+
+-- one time seed from post, on a database that already has the counts every group is already there and nothing is inserted
+INSERT OR IGNORE INTO post_month_count (month, total)
+    SELECT strftime('%Y-%m', created), COUNT(*) FROM post GROUP BY strftime('%Y-%m', created);
+INSERT OR IGNORE INTO post_author_count (author_id, total)
+    SELECT author_id, COUNT(*) FROM post GROUP BY author_id;
+
+CREATE TRIGGER IF NOT EXISTS post_count_insert AFTER INSERT ON post
+BEGIN
+    INSERT INTO post_month_count (month, total) VALUES (strftime('%Y-%m', NEW.created), 1)
+        ON CONFLICT (month) DO UPDATE SET total = total + 1;
+    INSERT INTO post_author_count (author_id, total) VALUES (NEW.author_id, 1)
+        ON CONFLICT (author_id) DO UPDATE SET total = total + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS post_count_delete AFTER DELETE ON post
+BEGIN
+    UPDATE post_month_count SET total = total - 1 WHERE month = strftime('%Y-%m', OLD.created);
+    DELETE FROM post_month_count WHERE month = strftime('%Y-%m', OLD.created) AND total <= 0;
+    UPDATE post_author_count SET total = total - 1 WHERE author_id = OLD.author_id;
+    DELETE FROM post_author_count WHERE author_id = OLD.author_id AND total <= 0;
+END;
+
+-- editing title/body doesnt touch the counts, only moving a post to another month or author does
+CREATE TRIGGER IF NOT EXISTS post_count_update_month AFTER UPDATE OF created ON post
+WHEN strftime('%Y-%m', OLD.created) IS NOT strftime('%Y-%m', NEW.created)
+BEGIN
+    UPDATE post_month_count SET total = total - 1 WHERE month = strftime('%Y-%m', OLD.created);
+    DELETE FROM post_month_count WHERE month = strftime('%Y-%m', OLD.created) AND total <= 0;
+    INSERT INTO post_month_count (month, total) VALUES (strftime('%Y-%m', NEW.created), 1)
+        ON CONFLICT (month) DO UPDATE SET total = total + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS post_count_update_author AFTER UPDATE OF author_id ON post
+WHEN OLD.author_id IS NOT NEW.author_id
+BEGIN
+    UPDATE post_author_count SET total = total - 1 WHERE author_id = OLD.author_id;
+    DELETE FROM post_author_count WHERE author_id = OLD.author_id AND total <= 0;
+    INSERT INTO post_author_count (author_id, total) VALUES (NEW.author_id, 1)
+        ON CONFLICT (author_id) DO UPDATE SET total = total + 1;
+END;
+
+COMMIT;
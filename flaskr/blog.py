@@ -1,4 +1,6 @@
-from flask import (Blueprint, flash, g, redirect, render_template, request, url_for)
+import sqlite3
+
+from flask import (Blueprint, current_app, flash, g, redirect, render_template, request, url_for)
 
 from werkzeug.exceptions import abort
 
@@ -23,7 +25,64 @@ def index():
         
         #print(posts[0]['title'])
     
-    return render_template('blog/index.html', posts = posts)
+    return render_template('blog/index.html', posts = posts, **get_sidebar())
+
+
+def get_sidebar():
+    #The sidebar counts are read from the post_month_count and post_author_count tables, which the triggers in aggregates.sql keep up to date on every insert, update and delete, so no GROUP BY over post is needed here.
+    db = get_db()
+
+    try:
+        months = db.execute(
+            """SELECT month, total FROM post_month_count ORDER BY month DESC"""
+        ).fetchall()
+
+        authors = db.execute(
+            """SELECT author_id, username, total FROM post_author_count a JOIN user u ON a.author_id = u.id
+             ORDER BY username"""
+        ).fetchall()
+    except sqlite3.OperationalError as e:
+        # a database from before these tables existed (upgrade-db not run yet) still shows the posts, just without the sidebar
+        current_app.logger.warning('sidebar disabled, run flask --app flaskr upgrade-db: %s', e)
+        return {}
+
+    return {'months': months, 'authors': authors}
+
+
+@bp.route('/author/<int:author_id>')
+def author(author_id):
+    #authors are addressed by id, auth.register accepts any username and ones like 'a/b', '/lead' or '..' would be rewritten as a path by werkzeug or the browser, so the username is only shown in the heading
+    db = get_db()
+    user = db.execute('SELECT username FROM user WHERE id = ?', (author_id,)).fetchone()
+
+    if user is None:
+        abort(404, f"user {author_id} doesn't exist")
+
+    posts = db.execute(
+        """SELECT p.id, title, body, created, author_id, username
+         FROM post p JOIN user u ON p.author_id = u.id
+          WHERE p.author_id = ? ORDER BY created DESC""", (author_id,)
+    ).fetchall()
+
+    return render_template('blog/index.html', posts=posts, heading=f"Posts by {user['username']}", **get_sidebar())
+
+
+@bp.route('/archive/<int:year>/<int:month>')
+def archive(year, month):
+    if not 1 <= month <= 12:
+        abort(404, f"month {month} doesn't exist")
+
+    #created is stored as 'YYYY-MM-DD HH:MM:SS' text, so a range on it can use the post_created index where strftime() on the column could not
+    start = f'{year:04d}-{month:02d}-01'
+    end = f'{year + 1:04d}-01-01' if month == 12 else f'{year:04d}-{month + 1:02d}-01'
+
+    posts = get_db().execute(
+        """SELECT p.id, title, body, created, author_id, username
+         FROM post p JOIN user u ON p.author_id = u.id
+          WHERE created >= ? AND created < ? ORDER BY created DESC""", (start, end)
+    ).fetchall()
+
+    return render_template('blog/index.html', posts=posts, heading=f'Posts from {year:04d}-{month:02d}', **get_sidebar())
 
 
 @bp.route('/create', methods=('GET', 'POST'))
@@ -32,9 +32,20 @@ def init_db():
     with current_app.open_resource('schema.sql') as f:
         db.executescript(f.read().decode('utf8'))
 
+    upgrade_db()
+
     #open_resource() opens a file relative to the flaskr package, which is useful since you won’t necessarily know where that location is when deploying the application later. get_db returns a database connection, which is used to execute the commands read from the file.
 
 
+def upgrade_db():
+    db = get_db()
+
+    with current_app.open_resource('aggregates.sql') as f:
+        db.executescript(f.read().decode('utf8'))
+
+    #aggregates.sql only uses IF NOT EXISTS and INSERT OR IGNORE, so it adds the post count tables, seeded from post, to a database made before they existed and does nothing on one that has them.
+
+
 @click.command('init-db')
 def init_db_command():
     '''clear the existing data and create new tables.'''
@@ -46,6 +57,110 @@ def init_db_command():
     #click.command() defines a command line command called init-db that calls the init_db function and shows a success message to the user. You can read Command Line Interface to learn more about writing commands.
 
 
+def check_aggregates(chunk_size=1000):
+    db = get_db()
+    months = {}
+    authors = {}
+
+    # no BEGIN around the scan, each chunk is its own short read so /create, /update and /delete only ever wait for one chunk
+    last_id = 0
+    while True:
+        rows = db.execute(
+            """SELECT id, author_id, strftime('%Y-%m', created) AS month FROM post
+            WHERE id > ? ORDER BY id LIMIT ?""", (last_id, chunk_size)
+        ).fetchall()
+
+        if not rows:
+            break
+
+        for row in rows:
+            months[row['month']] = months.get(row['month'], 0) + 1
+            authors[row['author_id']] = authors.get(row['author_id'], 0) + 1
+        last_id = rows[-1]['id']
+
+    stored_months = dict(db.execute('SELECT month, total FROM post_month_count').fetchall())
+    stored_authors = dict(db.execute('SELECT author_id, total FROM post_author_count').fetchall())
+
+    # posts written while the scan ran make it differ from the stored counts, so every difference is counted again for that one month or author before it is reported
+    mismatches = []
+    # key=str because a post whose created isnt a date gives a None month, it is reported as a mismatch instead of breaking the sort
+    for month in sorted(months.keys() | stored_months.keys(), key=str):
+        if months.get(month, 0) != stored_months.get(month, 0):
+            expected, stored = recount_month(db, month)
+            if expected != stored:
+                mismatches.append(f"month {month}: expected {expected}, stored {stored}")
+
+    for author_id in sorted(authors.keys() | stored_authors.keys()):
+        if authors.get(author_id, 0) != stored_authors.get(author_id, 0):
+            expected, stored = recount_author(db, author_id)
+            if expected != stored:
+                mismatches.append(f"author {author_id}: expected {expected}, stored {stored}")
+
+    return mismatches
+
+    #The post table is walked by id in chunks of chunk_size rows (keyset pagination, WHERE id > last_id) so the check never holds the whole table in one result set, only the running counts are kept in memory.
+
+
+def recount_month(db, month):
+    # the count and the stored total are read in one short transaction so they describe the same moment
+    db.execute('BEGIN')
+    try:
+        if month is None:
+            expected = db.execute(
+                "SELECT COUNT(*) FROM post WHERE strftime('%Y-%m', created) IS NULL"
+            ).fetchone()[0]
+        else:
+            # the range lets the post_created index find the month, strftime keeps the same grouping the triggers use
+            year, number = int(month[:4]), int(month[5:])
+            end = f'{year + 1:04d}-01-01' if number == 12 else f'{year:04d}-{number + 1:02d}-01'
+            expected = db.execute(
+                """SELECT COUNT(*) FROM post
+                WHERE created >= ? AND created < ? AND strftime('%Y-%m', created) = ?""", (f'{month}-01', end, month)
+            ).fetchone()[0]
+
+        stored = db.execute('SELECT total FROM post_month_count WHERE month IS ?', (month,)).fetchone()
+    finally:
+        db.rollback()
+
+    return expected, stored[0] if stored else 0
+
+
+def recount_author(db, author_id):
+    db.execute('BEGIN')
+    try:
+        expected = db.execute('SELECT COUNT(*) FROM post WHERE author_id = ?', (author_id,)).fetchone()[0]
+        stored = db.execute('SELECT total FROM post_author_count WHERE author_id = ?', (author_id,)).fetchone()
+    finally:
+        db.rollback()
+
+    return expected, stored[0] if stored else 0
+
+
+@click.command('upgrade-db')
+def upgrade_db_command():
+    '''add missing tables to an existing database without dropping data.'''
+
+    upgrade_db()
+
+    click.echo("Upgraded the database")
+
+
+@click.command('check-aggregates')
+@click.option('--chunk-size', default=1000, show_default=True, type=click.IntRange(min=1), help='Number of posts read per query.')
+def check_aggregates_command(chunk_size):
+    '''verify the post count summary tables against the post table.'''
+
+    mismatches = check_aggregates(chunk_size)
+
+    for mismatch in mismatches:
+        click.echo(mismatch)
+
+    if mismatches:
+        raise click.ClickException(f"{len(mismatches)} aggregate mismatches found")
+
+    click.echo("Aggregates are consistent")
+
+
 #IMPORTANT
 # The close_db and init_db_command functions need to be registered with the application instance; otherwise, they won’t be used by the application. However, since you’re using a factory function, that instance isn’t available when writing the functions. Instead, write a function that takes an application and does the registration.
     
@@ -54,6 +169,8 @@ def init_app(app):
     #app.teardown_appcontext() tells Flask to call that function when cleaning up after returning the response.
 
     app.cli.add_command(init_db_command)
+    app.cli.add_command(upgrade_db_command)
+    app.cli.add_command(check_aggregates_command)
     #adds a new command that can be called with the flask command.
 
     #Import and call this function from the factory. Place the new code at the end of the factory function before returning the app.
\ No newline at end of file
@@ -1,3 +1,5 @@
+DROP TABLE IF EXISTS post_month_count;
+DROP TABLE IF EXISTS post_author_count;
 DROP TABLE IF EXISTS user;
 DROP TABLE IF EXISTS post;
 
@@ -14,4 +16,6 @@ CREATE TABLE post (
     title TEXT NOT NULL,
     body TEXT NOT NULL,
     FOREIGN KEY (author_id) REFERENCES user (id)
-);
\ No newline at end of file
+);
+
+-- the indexes, post count tables and their triggers are in aggregates.sql, init_db runs it right after this file
@@ -102,4 +102,106 @@ def test_delete(app,client,auth):
     with app.app_context():
         db = get_db()
         post = db.execute('SELECT * FROM post WHERE id = 1').fetchone()
-        assert post is None
\ No newline at end of file
+        assert post is None
+
+#The author and archive pages only list the matching posts, and unknown users or months return 404 Not Found.
+
+def test_author(client):
+    response = client.get('/author/1')
+    assert b'Posts by test' in response.data
+    assert b'test title' in response.data
+
+    assert b'test title' not in client.get('/author/2').data
+    assert client.get('/author/3').status_code == 404
+
+
+@pytest.mark.parametrize(('path', 'found'), (
+    ('/archive/2018/1', True),
+    ('/archive/2017/12', False),
+    ('/archive/2018/2', False),
+))
+def test_archive(client, path, found):
+    response = client.get(path)
+    assert response.status_code == 200
+    assert (b'test title' in response.data) == found
+
+
+def test_archive_invalid_month(client):
+    assert client.get('/archive/2018/13').status_code == 404
+
+
+#The sidebar counts come from the summary tables, which the triggers must keep exact on every insert, update and delete.
+
+def get_counts(app):
+    with app.app_context():
+        db = get_db()
+        months = dict(db.execute('SELECT month, total FROM post_month_count').fetchall())
+        authors = dict(db.execute('SELECT author_id, total FROM post_author_count').fetchall())
+    return months, authors
+
+
+def test_sidebar(client):
+    response = client.get('/')
+    assert b'href="/archive/2018/1">2018-01</a> (1)' in response.data
+    assert b'href="/author/1">test</a> (1)' in response.data
+
+
+def test_aggregates_follow_changes(app, client, auth):
+    assert get_counts(app) == ({'2018-01': 1}, {1: 1})
+
+    auth.login()
+    client.post('/create', data={'title': 'created', 'body': ''})
+    months, authors = get_counts(app)
+    assert months['2018-01'] == 1 and sum(months.values()) == 2
+    assert authors == {1: 2}
+
+    with app.app_context():
+        db = get_db()
+        db.execute("UPDATE post SET author_id = 2, created = '2018-02-03 00:00:00' WHERE id = 1")
+        db.commit()
+    months, authors = get_counts(app)
+    assert '2018-01' not in months and months['2018-02'] == 1
+    assert authors == {1: 1, 2: 1}
+
+    client.post('/2/delete')
+    assert get_counts(app) == ({'2018-02': 1}, {2: 1})
+
+
+@pytest.mark.parametrize('username', ('a/b', '/lead', '..', '.'))
+def test_author_with_slash(app, client, username):
+    # auth.register accepts any username, even ones that look like a path
+    with app.app_context():
+        db = get_db()
+        db.execute("INSERT INTO user (username, password) VALUES ('lead', 'x')")
+        db.execute("INSERT INTO user (username, password) VALUES (?, 'x')", (username,))
+        db.execute("INSERT INTO post (title, body, author_id) VALUES ('lead title', '', 3)")
+        db.execute("INSERT INTO post (title, body, author_id) VALUES ('slash title', '', 4)")
+        db.commit()
+
+    assert f'href="/author/4">{username}</a> (1)'.encode() in client.get('/').data
+
+    response = client.get('/author/4')
+    assert response.status_code == 200
+    assert f'Posts by {username}'.encode() in response.data
+    assert b'slash title' in response.data
+    assert b'lead title' not in response.data
+
+
+def test_pages_without_count_tables(app, client):
+    # a database from before the post counts, upgrade-db not run yet
+    with app.app_context():
+        db = get_db()
+        db.executescript("""
+            DROP TRIGGER post_count_insert;
+            DROP TRIGGER post_count_delete;
+            DROP TRIGGER post_count_update_month;
+            DROP TRIGGER post_count_update_author;
+            DROP TABLE post_month_count;
+            DROP TABLE post_author_count;
+        """)
+
+    for path in ('/', '/author/1', '/archive/2018/1'):
+        response = client.get(path)
+        assert response.status_code == 200
+        assert b'test title' in response.data
+        assert b'class="sidebar"' not in response.data
@@ -1,7 +1,7 @@
 import sqlite3
 
 import pytest
-from flaskr.db import get_db
+from flaskr.db import check_aggregates, get_db
 
 #this test probably will fail haha
 def test_get_close_db(app):
@@ -29,3 +29,104 @@ def test_init_db_command(runner, monkeypatch):
 
     #This test uses Pytest’s monkeypatch fixture to replace the init_db function with one that records that it’s been called. The runner fixture you wrote above is used to call the init-db command by name.
 
+
+# the flask command runs app.cli commands inside an app context, runner.invoke doesnt so the tests push one
+
+def test_check_aggregates_command(app, runner):
+    with app.app_context():
+        result = runner.invoke(args=['check-aggregates', '--chunk-size', '1'])
+    assert result.exit_code == 0
+    assert 'consistent' in result.output
+
+    # break the summary table by hand, the check has to notice it
+    with app.app_context():
+        db = get_db()
+        db.execute("UPDATE post_month_count SET total = 5 WHERE month = '2018-01'")
+        db.execute('DELETE FROM post_author_count')
+        db.commit()
+
+    with app.app_context():
+        result = runner.invoke(args=['check-aggregates'])
+    assert result.exit_code != 0
+    assert 'month 2018-01: expected 1, stored 5' in result.output
+    assert 'author 1: expected 1, stored 0' in result.output
+
+
+def test_check_aggregates_does_not_block_writers(app):
+    # check-aggregates must not hold a lock across chunks, a post deleted between two chunks is not reported either
+    with app.app_context():
+        db = get_db()
+        db.execute("INSERT INTO post (title, body, author_id, created) VALUES ('second', '', 1, '2018-01-02 00:00:00')")
+        db.commit()
+
+        chunks = []
+
+        def delete_between_chunks(sql):
+            if 'WHERE id >' in sql:
+                chunks.append(sql)
+                if len(chunks) == 2:
+                    writer = sqlite3.connect(app.config['DATABASE'], timeout=0)
+                    writer.execute('DELETE FROM post WHERE id = 1')
+                    writer.commit()
+                    writer.close()
+
+        db.set_trace_callback(delete_between_chunks)
+        assert check_aggregates(chunk_size=1) == []
+        db.set_trace_callback(None)
+
+        assert len(chunks) == 3
+        assert db.execute('SELECT COUNT(id) FROM post').fetchone()[0] == 1
+
+
+def test_upgrade_db_command(app, runner):
+    # a database from before the post counts existed
+    with app.app_context():
+        db = get_db()
+        db.executescript("""
+            DROP TABLE post_month_count;
+            DROP TABLE post_author_count;
+            DROP TRIGGER post_count_insert;
+            DROP TRIGGER post_count_delete;
+            DROP TRIGGER post_count_update_month;
+            DROP TRIGGER post_count_update_author;
+            INSERT INTO post (title, body, author_id, created) VALUES ('old', '', 2, '2018-01-05 00:00:00');
+        """)
+
+    # running it twice must not count the posts twice
+    for _ in range(2):
+        with app.app_context():
+            result = runner.invoke(args=['upgrade-db'])
+        assert 'Upgraded' in result.output
+
+    with app.app_context():
+        db = get_db()
+        assert dict(db.execute('SELECT month, total FROM post_month_count').fetchall()) == {'2018-01': 2}
+        assert dict(db.execute('SELECT author_id, total FROM post_author_count').fetchall()) == {1: 1, 2: 1}
+        assert db.execute('SELECT COUNT(id) FROM post').fetchone()[0] == 2
+
+    with app.app_context():
+        assert 'consistent' in runner.invoke(args=['check-aggregates']).output
+
+
+def test_post_without_date_is_rejected(app):
+    with app.app_context():
+        db = get_db()
+        with pytest.raises(sqlite3.IntegrityError):
+            db.execute("INSERT INTO post (title, body, author_id, created) VALUES ('bad', '', 1, 'not a date')")
+        with pytest.raises(sqlite3.IntegrityError):
+            db.execute("UPDATE post SET created = 'not a date' WHERE id = 1")
+
+
+def test_check_aggregates_reports_undated_post(app, runner):
+    # a row written while the triggers were missing, before upgrade-db
+    with app.app_context():
+        db = get_db()
+        db.executescript("""
+            DROP TRIGGER post_count_insert;
+            INSERT INTO post (title, body, author_id, created) VALUES ('bad', '', 1, 'not a date');
+        """)
+
+    with app.app_context():
+        result = runner.invoke(args=['check-aggregates'])
+    assert result.exit_code != 0
+    assert 'month None: expected 1, stored 0' in result.output